@@ -10,34 +10,43 @@ The overall flow of the script is as follows:
 """
 
 # Imports
-import pandas as pd
-import numpy as np
 import requests
-import shelve
+import orjson
+import os
 import pytz
 import time
 import schedule
 import smtplib
 import calendar
+import functools
 
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 from pandas_market_calendars import get_calendar
 from config import settings
 from typing import Literal
 from pathlib import Path
 from loguru import logger
+from requests.adapters import HTTPAdapter
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
-# Set up a logging directory
-log_dir = Path(__file__).parent / 'logs'
-log_dir.mkdir(exist_ok=True)
 
-# Create log file path with timestamp
-log_file = log_dir / f"tastytrade_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+def _setup_logging():
+    """
+    Add a timestamped, daily-rotated log file sink under ./logs next to the console output.
+    Only called when running as a script so importing the module has no filesystem side effects.
+    """
+    # Set up a logging directory
+    log_dir = Path(__file__).parent / 'logs'
+    log_dir.mkdir(exist_ok=True)
+
+    # Create log file path with timestamp
+    log_file = log_dir / f"tastytrade_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+
+    # Configure logger to write to both console and file
+    logger.add(log_file, rotation="1 day")
 
-# Configure logger to write to both console and file
-logger.add(log_file, rotation="1 day")
 
 EnvironmentType = Literal['sandbox', 'production']  # create a type alias
 
@@ -45,8 +54,19 @@ EnvironmentType = Literal['sandbox', 'production']  # create a type alias
 ENVIRONMENT: EnvironmentType = settings.ENVIRONMENT
 logger.info(f'Using environment: {ENVIRONMENT}')
 
+# Resolve the environment-specific endpoints once instead of on every request
+BASE_URL = settings.TASTY_SANDBOX_BASE_URL if ENVIRONMENT == 'sandbox' else settings.TASTY_PRODUCTION_BASE_URL
+ACCOUNT_NUMBER = settings.TASTY_SANDBOX.ACCOUNT_NUMBER if ENVIRONMENT == 'sandbox' else settings.TASTY_PRODUCTION.ACCOUNT_NUMBER
+POSITIONS_URL = f"{BASE_URL}/accounts/{ACCOUNT_NUMBER}/positions"
+ORDERS_URL = f"{BASE_URL}/accounts/{ACCOUNT_NUMBER}/orders"
+
 fixed_allocation = 2000  # dollar value of my fixed allocation to TQQQ.
 
+# Shared HTTP session so every call to tastytrade reuses the same keep-alive connection pool
+SESSION = requests.Session()
+SESSION.headers.update({"Connection": "keep-alive"})
+SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=10))
+
 
 # ----------------Authentication----------------
 
@@ -63,15 +83,16 @@ def get_session_token(environment: EnvironmentType):
     Examples:
         session_token = get_session_token('sandbox')
     """
-    with shelve.open(str(Path(settings.SESSION_SHELF_DIR) / 'session_data')) as db:
-        session_token = db.get('session_token')
-        token_expiry = db.get('token_expiry')
+    session_file = Path(settings.SESSION_SHELF_DIR) / 'session_data.json'
+    data = orjson.loads(session_file.read_bytes()) if session_file.exists() else {}
+    session_token = data.get('session_token')
+    token_expiry = datetime.fromisoformat(data['token_expiry']) if data.get('token_expiry') else None
 
-        # Check if we have a valid token that hasn't expired
-        if session_token and token_expiry and datetime.now() < token_expiry:
-            logger.success('Found existing session token.', extra={'session_token': session_token})
-            logger.info(f'Existing session token will expire at {token_expiry}.')
-            return session_token
+    # Check if we have a valid token that hasn't expired
+    if session_token and token_expiry and datetime.now() < token_expiry:
+        logger.success('Found existing session token.', extra={'session_token': session_token})
+        logger.info(f'Existing session token will expire at {token_expiry}.')
+        return session_token
 
     # If we get here, we either don't have a token or it's expired
     logger.warning('Session token expired or invalid, generating new session token...')
@@ -91,21 +112,24 @@ def get_session_token(environment: EnvironmentType):
         }
     logger.debug('Generated payload.')
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url, json=payload, headers=headers)
+    response = SESSION.post(url, json=payload, headers=headers)
     logger.info(f'Posted request: {response}')
 
     if response.status_code == 201:
         logger.success(f'Response status code: {response.status_code}. Received session token.')
-        data = response.json()
+        data = orjson.loads(response.content)
         new_session_token = data['data']['session-token']
         new_token_expiry = datetime.now() + timedelta(hours=24)
         logger.debug(f'Saved new session token expiring at: {new_token_expiry}.')
 
-        # Open a new shelf connection to store the token
-        with shelve.open(str(Path(settings.SESSION_SHELF_DIR) / 'session_data')) as db:
-            db['session_token'] = new_session_token
-            db['token_expiry'] = new_token_expiry
-            logger.success('Stored new session token and token expiry.')
+        # Write to a temp file and rename it over the old one so a crash never leaves a half-written token
+        tmp_file = session_file.with_suffix('.tmp')
+        tmp_file.write_bytes(orjson.dumps({
+            'session_token': new_session_token,
+            'token_expiry': new_token_expiry.isoformat()
+        }))
+        os.replace(tmp_file, session_file)
+        logger.success('Stored new session token and token expiry.')
 
         return new_session_token
     else:
@@ -116,6 +140,11 @@ def get_session_token(environment: EnvironmentType):
 
 # ----------------Get Position----------------
 
+# Positions don't change within a single rebalancing run, so cache the last lookup briefly
+POSITION_CACHE_TTL = 5  # seconds
+_position_cache = {'ts': 0.0, 'session_token': None, 'value': None}
+
+
 def get_position(session_token):
     """
     Retrieve TQQQ position information using the provided session token.
@@ -130,20 +159,25 @@ def get_position(session_token):
             - current_price (float): The current market price of TQQQ
     
     Raises:
-        None
+        requests.HTTPError: If the positions request returns an error status.
     """
-    positions = requests.get(f"{settings.TASTY_SANDBOX_BASE_URL if ENVIRONMENT == 'sandbox' else settings.TASTY_PRODUCTION_BASE_URL}/accounts/{settings.TASTY_SANDBOX.ACCOUNT_NUMBER if ENVIRONMENT == 'sandbox' else settings.TASTY_PRODUCTION.ACCOUNT_NUMBER}/positions", 
-    headers={'Authorization': session_token}).json()
+    # Serve the cached position if it was fetched with the same token within the TTL
+    if (_position_cache['value'] is not None
+            and _position_cache['session_token'] == session_token
+            and time.time() - _position_cache['ts'] < POSITION_CACHE_TTL):
+        logger.debug('Using cached TQQQ position.')
+        return _position_cache['value']
+
+    # Ask the API for the TQQQ row only instead of pulling every position in the account
+    response = SESSION.get(POSITIONS_URL, params={'symbol': 'TQQQ'}, headers={'Authorization': session_token})
+    response.raise_for_status()  # don't try to decode an error page as positions
+    positions = orjson.loads(response.content)
     
-    # Find TQQQ position in the items list
-    tqqq_position = None
-    for position in positions["data"]["items"]:
-        if position["symbol"] == "TQQQ":
-            tqqq_position = position
-            break
+    # Still match on symbol in case the filter is ignored and the full list comes back
+    tqqq_position = next((p for p in positions["data"]["items"] if p["symbol"] == "TQQQ"), None)
     
     if tqqq_position is None:
-        return 0, 0.0, 0.0  # Return 0 quantity, 0 PnL, and 0 price if no TQQQ position is found
+        return _cache_position(session_token, (0, 0.0, 0.0))  # 0 quantity, 0 PnL, and 0 price if no TQQQ position is found
     
     # Calculate quantity (positive for long, negative for short)
     quantity = float(tqqq_position["quantity"])
@@ -160,11 +194,22 @@ def get_position(session_token):
     if quantity < 0:
         unrealized_pnl = -unrealized_pnl
     
-    return quantity, unrealized_pnl, close_price
+    return _cache_position(session_token, (quantity, unrealized_pnl, close_price))
+
+
+def _cache_position(session_token, value):
+    """Store a freshly fetched position in the cache and return it."""
+    _position_cache.update(ts=time.time(), session_token=session_token, value=value)
+    return value
+
+
+def _clear_position_cache():
+    """Drop the cached position so the next lookup hits the API."""
+    _position_cache.update(ts=0.0, session_token=None, value=None)
 
 
 # ----------------Rebalancer----------------
-def rebalance(session_token):
+def rebalance(position):
     """
     Rebalance the TQQQ position to maintain the fixed allocation value.
     If no position exists, buy shares worth the fixed allocation.
@@ -172,15 +217,14 @@ def rebalance(session_token):
     If the position value is below the fixed allocation, buy shares.
 
     Args:
-        session_token (str): The session token for authentication.
+        position (tuple): The (quantity, unrealized_pnl, current_price) tuple from get_position.
 
     Returns:
         tuple: A tuple containing (action, shares_to_trade) where:
             - action (str): 'BUY' or 'SELL'
             - shares_to_trade (int): Number of shares to trade
     """
-    # Get current position information
-    quantity, _, current_price = get_position(session_token)
+    quantity, _, current_price = position
     
     # If no position exists, buy shares worth the fixed allocation
     if quantity == 0:
@@ -212,7 +256,13 @@ def rebalance(session_token):
 
 
 # ----------------Execute Order----------------
-def execute_order(session_token, action, quantity):
+
+# Order fields that never change for this strategy, merged with the per-trade values in execute_order
+_ORDER_TEMPLATE = {"time-in-force": "Day", "order-type": "Limit"}
+_ORDER_LEG_TEMPLATE = {"instrument-type": "Equity", "symbol": "TQQQ"}
+
+
+def execute_order(session_token, action, quantity, current_price):
     """
     Execute a limit order for TQQQ.
 
@@ -220,13 +270,14 @@ def execute_order(session_token, action, quantity):
         session_token (str): The session token for authentication
         action (str): 'BUY' or 'SELL'
         quantity (int): Number of shares to trade
+        current_price (float): The current market price of TQQQ, used to set the limit price
 
     Returns:
         dict: The order response from the API
+
+    Raises:
+        requests.HTTPError: If the order request returns an error status.
     """
-    # Get current price to set limit price
-    _, _, current_price = get_position(session_token)
-    
     # Set limit price 0.5% away from current price
     # For buys: limit is 0.5% above current price
     # For sells: limit is 0.5% below current price
@@ -240,49 +291,69 @@ def execute_order(session_token, action, quantity):
     price_effect = "Debit" if action == "BUY" else "Credit"
     
     order_payload = {
-        "time-in-force": "Day",
-        "order-type": "Limit",
+        **_ORDER_TEMPLATE,
         "price": limit_price,
         "price-effect": price_effect,
-        "legs": [
-            {
-                "instrument-type": "Equity",
-                "symbol": "TQQQ",
-                "quantity": quantity,
-                "action": tasty_action
-            }
-        ]
+        "legs": [{**_ORDER_LEG_TEMPLATE, "quantity": quantity, "action": tasty_action}]
     }
     
     # Submit the order
-    response = requests.post(
-        f"{settings.TASTY_SANDBOX_BASE_URL if ENVIRONMENT == 'sandbox' else settings.TASTY_PRODUCTION_BASE_URL}/accounts/{settings.TASTY_SANDBOX.ACCOUNT_NUMBER if ENVIRONMENT == 'sandbox' else settings.TASTY_PRODUCTION.ACCOUNT_NUMBER}/orders",
+    response = SESSION.post(
+        ORDERS_URL,
         headers={'Authorization': session_token},
         json=order_payload
     )
+    _clear_position_cache()  # the order may change the position, don't serve a stale one
+    try:
+        response.raise_for_status()
+    except requests.HTTPError as e:
+        # Keep tastytrade's error body, it says why the order was rejected
+        logger.error(f'Order request failed with response code: {response.status_code}.')
+        logger.debug(f'{response.text}')
+        raise requests.HTTPError(f"{e}: {response.text}", response=response) from e
     
-    return response.json()
+    return orjson.loads(response.content)
 
 
 # ----------------Email Update----------------
-def send_email_update(trade_info=None, error_message=None):
+
+def _connect_smtp():
+    """
+    Open an authenticated SMTP session to the Gmail server.
+
+    Returns:
+        smtplib.SMTP: The logged-in SMTP connection
+    """
+    server = smtplib.SMTP('smtp.gmail.com', 587)
+    server.starttls()
+    server.login(settings.EMAIL.SENDER, settings.EMAIL.SENDER_PASSWORD)
+    return server
+
+
+def send_email_update(session_token, trade_info=None, error_message=None):
     """
     Send an email update about the TQQQ rebalancing activity.
     
     Args:
+        session_token (str): The session token for authentication, None if login failed
         trade_info (dict): Information about the trade executed
         error_message (str): Error message if something went wrong
     """
     try:
-        # Create SMTP session
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(settings.EMAIL.SENDER, settings.EMAIL.SENDER_PASSWORD)
-        
-        # Get current position information
-        session_token = get_session_token(ENVIRONMENT)
-        quantity, unrealized_pnl, current_price = get_position(session_token)
-        current_value = abs(quantity) * current_price
+        # Open the SMTP session in the background while we fetch the position,
+        # the two handshakes don't depend on each other
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            smtp_future = executor.submit(_connect_smtp)
+            
+            # Get current position information, unless we never managed to log in
+            position = None
+            if session_token:
+                try:
+                    position = get_position(session_token)
+                except Exception as e:  # the position is optional, the email must still go out
+                    logger.warning(f"Could not fetch position for email update: {str(e)}")
+            
+            server = smtp_future.result()
         
         # Construct email subject
         subject = "TQQQ Rebalancing Update"
@@ -293,12 +364,17 @@ def send_email_update(trade_info=None, error_message=None):
         body = []
         body.append(f"TQQQ Position Update - {datetime.now().strftime('%Y-%m-%d %H:%M:%S EST')}\n")
         body.append(f"Current Position:")
-        body.append(f"  Shares: {quantity}")
-        body.append(f"  Price: ${current_price:.2f}")
-        body.append(f"  Position Value: ${current_value:.2f}")
-        body.append(f"  Unrealized P&L: ${unrealized_pnl:.2f}")
-        body.append(f"  Target Allocation: ${fixed_allocation:.2f}")
-        body.append(f"  Difference from Target: ${current_value - fixed_allocation:.2f}")
+        if position:
+            quantity, unrealized_pnl, current_price = position
+            current_value = abs(quantity) * current_price
+            body.append(f"  Shares: {quantity}")
+            body.append(f"  Price: ${current_price:.2f}")
+            body.append(f"  Position Value: ${current_value:.2f}")
+            body.append(f"  Unrealized P&L: ${unrealized_pnl:.2f}")
+            body.append(f"  Target Allocation: ${fixed_allocation:.2f}")
+            body.append(f"  Difference from Target: ${current_value - fixed_allocation:.2f}")
+        else:
+            body.append(f"  Unavailable")
         
         if trade_info:
             body.append(f"\nTrade Executed:")
@@ -316,8 +392,10 @@ def send_email_update(trade_info=None, error_message=None):
         email_text = f"Subject: {subject}\n\n" + "\n".join(body)
         
         # Send email
-        server.sendmail(settings.EMAIL.SENDER, settings.EMAIL.RECEIVER, email_text)
-        server.quit()
+        try:
+            server.sendmail(settings.EMAIL.SENDER, settings.EMAIL.RECEIVER, email_text)
+        finally:
+            server.quit()
         logger.info("Email update sent successfully")
         
     except Exception as e:
@@ -330,6 +408,8 @@ def main():
     Main function to run the TQQQ rebalancing strategy.
     """
     logger.info("Starting TQQQ rebalancing process...")
+    _clear_position_cache()  # each scheduled run starts from a fresh position
+    session_token = None
     
     try:
         # Get session token
@@ -337,21 +417,25 @@ def main():
         if not session_token:
             error_msg = "Failed to get session token"
             logger.error(error_msg)
-            send_email_update(error_message=error_msg)
+            send_email_update(session_token, error_message=error_msg)
             return
         
+        # Fetch the position once and share it between the rebalancer and the order
+        position = get_position(session_token)
+        _, _, current_price = position
+        
         # Check if rebalancing is needed
-        action, shares_to_trade = rebalance(session_token)
+        action, shares_to_trade = rebalance(position)
         
         if not action:
             logger.info("No rebalancing needed")
-            send_email_update()  # Send position update even when no trade needed
+            send_email_update(session_token)  # Send position update even when no trade needed
             return
         
         # Execute the trade if needed
         logger.info(f"Executing {action} order for {shares_to_trade} shares of TQQQ")
         try:
-            order_response = execute_order(session_token, action, shares_to_trade)
+            order_response = execute_order(session_token, action, shares_to_trade, current_price)
             
             # Prepare trade info for email
             trade_info = {
@@ -361,49 +445,42 @@ def main():
             }
             
             logger.info(f"Order submitted successfully: {order_response}")
-            send_email_update(trade_info=trade_info)
+            send_email_update(session_token, trade_info=trade_info)
             
         except Exception as e:
             error_msg = f"Error executing order: {str(e)}"
             logger.error(error_msg)
-            send_email_update(error_message=error_msg)
+            send_email_update(session_token, error_message=error_msg)
             return
 
     except Exception as e:
         error_msg = f"Unexpected error in rebalancing process: {str(e)}"
         logger.error(error_msg)
-        send_email_update(error_message=error_msg)
+        send_email_update(session_token, error_message=error_msg)
         return
 
     logger.info("TQQQ rebalancing completed")
 
 
+@functools.lru_cache(maxsize=1)
+def _last_trading_day(year, month):
+    """
+    Return the last NYSE trading day of the given month as a date, accounting for holidays.
+    Memoized, so the NYSE calendar is only loaded once per month rather than on every check.
+    """
+    nyse = get_calendar('NYSE')
+    _, last_day = calendar.monthrange(year, month)
+    trading_days = nyse.valid_days(start_date=date(year, month, 1), end_date=date(year, month, last_day))
+    return trading_days[-1].date()
+
+
 def is_last_trading_day():
     """
     Check if today is the last trading day of the month using NYSE calendar.
     Returns True if it's the last trading day of the month, accounting for holidays.
     """
-    nyse = get_calendar('NYSE')
     today = datetime.now().date()
-    
-    # Get the last day of the current month
-    _, last_day = calendar.monthrange(today.year, today.month)
-    month_end = datetime(today.year, today.month, last_day).date()
-    
-    # Get next month's first day
-    if today.month == 12:
-        next_month = datetime(today.year + 1, 1, 1).date()
-    else:
-        next_month = datetime(today.year, today.month + 1, 1).date()
-    
-    # Get the trading days for this month
-    trading_days = nyse.valid_days(start_date=today, end_date=next_month)
-    
-    # Convert to date objects for comparison
-    trading_days = [d.date() for d in trading_days]
-    
-    # If today is a trading day and it's the last one before next month
-    return today in trading_days and today == trading_days[-1]
+    return today == _last_trading_day(today.year, today.month)
 
 
 def scheduled_job():
@@ -418,12 +495,17 @@ def scheduled_job():
 
 
 if __name__ == "__main__":
+    _setup_logging()
     logger.info("Starting TQQQ monthly rebalancing scheduler...")
     
     # Schedule the job to run every day at 15:45 EST (market close is 16:00 EST)
     schedule.every().day.at("15:45").do(scheduled_job)
     
-    # Keep the script running
+    # Keep the script running, sleeping until the next job is actually due
     while True:
-        schedule.run_pending()
-        time.sleep(60)  # Check every minute
\ No newline at end of file
+        idle_seconds = schedule.idle_seconds()
+        if idle_seconds is None:
+            break  # no jobs left to run
+        if idle_seconds > 0:
+            time.sleep(idle_seconds)
+        schedule.run_pending()
\ No newline at end of file